@@ -1,13 +1,37 @@
 import os
+import re
+import gzip
+import functools
+import hashlib
+import pickle
+import tempfile
+import queue
+import types
+import threading
+import time
+from urllib.parse import urlencode
 import yaml
-import requests
-from flask import Flask, render_template_string, request, redirect, url_for, jsonify
+import jinja2
+from markupsafe import escape
+import orjson
+import urllib3
+from urllib3.exceptions import NewConnectionError, ProtocolError, TimeoutError as BridgeTimeout
+from flask import Flask, Response, abort, request, redirect
 
 
 # ========= Configuration loading =========
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+# Parsed copy of config.yaml, reused while the YAML file is unchanged.
+CONFIG_CACHE_PATH = CONFIG_PATH + ".pkl"
+
+
+# Prefer the libyaml C loader when PyYAML was built with it.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 
 def load_config() -> dict:
@@ -27,27 +51,67 @@ def load_config() -> dict:
     web:
       port: 5000
       language: "en"
+      threads: 8
     """
     if not os.path.exists(CONFIG_PATH):
         raise RuntimeError(f"Config file not found: {CONFIG_PATH}")
 
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
+    # Cache key: any edit to config.yaml changes its mtime and/or size.
+    st = os.stat(CONFIG_PATH)
+    key = (st.st_mtime_ns, st.st_size)
+
+    try:
+        with open(CONFIG_CACHE_PATH, "rb") as f:
+            cached_key, data = pickle.load(f)
+        if cached_key == key:
+            return data
+    except Exception:
+        # Missing, stale-format or corrupt cache: just parse the YAML.
+        pass
 
+    # Read the whole file at once: libyaml parses an in-memory buffer faster
+    # than it pulls from a file object.
+    with open(CONFIG_PATH, "rb") as f:
+        raw = f.read()
+
+    data = yaml.load(raw, Loader=_YamlLoader) or {}
+
+    _write_config_cache(key, data)
     return data
 
 
+def _write_config_cache(key: tuple, data: dict):
+    """Atomically write the parsed config cache; failures are ignored (read-only dir, ...)."""
+    try:
+        # mkstemp creates the file as 0600: the cache holds the bridge token.
+        fd, tmp_path = tempfile.mkstemp(dir=BASE_DIR, prefix=".config.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, CONFIG_CACHE_PATH)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
 _cfg = load_config()
 
-BRIDGE_HOST = _cfg.get("bridge", {}).get("host", "127.0.0.1")
-BRIDGE_PORT = _cfg.get("bridge", {}).get("port", 8080)
+_bridge = _cfg.get("bridge") or {}
+_nuki = _cfg.get("nuki") or {}
+_web = _cfg.get("web") or {}
+
+BRIDGE_HOST = _bridge.get("host", "127.0.0.1")
+BRIDGE_PORT = _bridge.get("port", 8080)
 
-NUKI_ID = _cfg.get("nuki", {}).get("id")
-TOKEN = _cfg.get("nuki", {}).get("token", "")
-DEVICE_TYPE = _cfg.get("nuki", {}).get("device_type", 0)
+NUKI_ID = _nuki.get("id")
+TOKEN = _nuki.get("token", "")
+DEVICE_TYPE = _nuki.get("device_type", 0)
 
-WEB_PORT = _cfg.get("web", {}).get("port", 5000)
-DEFAULT_LANG = _cfg.get("web", {}).get("language", "en")
+WEB_PORT = _web.get("port", 5000)
+WEB_THREADS = _web.get("threads", 8)
+DEFAULT_LANG = _web.get("language", "en")
 
 
 if NUKI_ID is None:
@@ -91,7 +155,6 @@ STRINGS = {
         "bridge_error_prefix": "Error: ",
         "ok_msg": "OK (batteryCritical={batteryCritical})",
         "bridge_response_prefix": "Bridge response: ",
-        "error_keyword": "Error",
 
         "js_label_state": "State: ",
         "js_label_door": "Door: ",
@@ -131,7 +194,6 @@ STRINGS = {
         "bridge_error_prefix": "Errore: ",
         "ok_msg": "OK (batteryCritical={batteryCritical})",
         "bridge_response_prefix": "Risposta bridge: ",
-        "error_keyword": "Errore",
 
         "js_label_state": "Stato: ",
         "js_label_door": "Porta: ",
@@ -141,56 +203,244 @@ STRINGS = {
     },
 }
 
+# Only the strings the page script reads are shipped to the browser.
+_JS_UI_KEYS = (
+    "js_label_state",
+    "js_label_door",
+    "js_label_battery",
+    "js_label_last_update",
+    "js_error_prefix",
+    "bridge_error_prefix",
+)
+
+# Serialized once: the strings never change at runtime. The JSON is emitted as
+# a JS string literal for JSON.parse(), which browsers parse faster than an
+# object literal. "<" is escaped so it can sit verbatim inside a <script> block.
+UI_JSON = {
+    lang: orjson.dumps(orjson.dumps({k: strings[k] for k in _JS_UI_KEYS}).decode("utf-8"))
+    .decode("utf-8")
+    .replace("<", "\\u003c")
+    for lang, strings in STRINGS.items()
+}
+
+
+# Attribute-access view of STRINGS for the request handlers and the template.
+STRINGS_NS = {lang: types.SimpleNamespace(**strings) for lang, strings in STRINGS.items()}
+
+# Validate the configured default once so resolve_lang() can return it as-is.
+if DEFAULT_LANG not in STRINGS:
+    DEFAULT_LANG = "en"
+
+_DEFAULT_LANG_UI = (DEFAULT_LANG, STRINGS_NS[DEFAULT_LANG])
+_FALLBACK_LANG_UI = ("en", STRINGS_NS["en"])
+
 
-def resolve_lang() -> str:
+def resolve_lang() -> tuple:
     """Resolve current language from ?lang= query param or config default.
 
-    Fallback to English if unknown code.
+    Fallback to English if unknown code. Returns (lang, ui strings).
     """
-    lang = request.args.get("lang") or DEFAULT_LANG or "en"
-    if lang not in STRINGS:
-        lang = "en"
-    return lang
+    lang = request.args.get("lang")
+    if not lang:
+        return _DEFAULT_LANG_UI
+    lang = lang.lower()
+    ui = STRINGS_NS.get(lang)
+    return (lang, ui) if ui is not None else _FALLBACK_LANG_UI
 
 
 # ========= Bridge helpers =========
 
+# One connection pool for all bridge calls: every request goes to the same
+# host:port, so keep-alive connections are reused instead of reopened.
+# urllib3 is used directly; the requests layers add nothing for these calls.
+# retries=False: fail fast like requests did, and raise the real error.
+POOL = urllib3.PoolManager(num_pools=1, maxsize=16, retries=False)
+
+# Bridge URLs and query parameters never change after startup.
+STATE_URL = f"http://{BRIDGE_HOST}:{BRIDGE_PORT}/lockState"
+ACTION_URL = f"http://{BRIDGE_HOST}:{BRIDGE_PORT}/lockAction"
+
+# The query strings are encoded once too, so a call does no param encoding.
+# Never log or expose these URLs: they contain the token.
+_BASE_QS = urlencode((("nukiId", NUKI_ID), ("deviceType", DEVICE_TYPE), ("token", TOKEN)))
+_STATE_URL_FULL = f"{STATE_URL}?{_BASE_QS}"
+_ACTION_URL_FULL = {a: f"{ACTION_URL}?{_BASE_QS}&action={a}" for a in (1, 2, 3, 4, 5)}
+
+# Bridge timeouts (seconds). The bridge is on the LAN, so a connect that takes
+# longer than CONNECT_TIMEOUT means it is down. Lock actions wait for the motor
+# over BLE, so they get more read headroom than state reads.
+CONNECT_TIMEOUT = 3.0
+STATE_TIMEOUT = 3.0
+ACTION_TIMEOUT = 10.0
+
+_STATE_TIMEOUT = urllib3.Timeout(connect=CONNECT_TIMEOUT, read=STATE_TIMEOUT)
+_ACTION_TIMEOUT = urllib3.Timeout(connect=CONNECT_TIMEOUT, read=ACTION_TIMEOUT)
+
+# How long (seconds) a /lockState answer is reused before asking the bridge again.
+# Rapid refreshes and concurrent clients share a single bridge call.
+STATE_TTL = 1.5
+
+_state_cache = {"ts": 0.0, "val": None, "gen": 0}
+_state_lock = threading.Lock()
+
+# Bumped by refresh_latest_state() without taking _state_lock, which is held
+# for a whole bridge call. A cached answer is only fresh for its generation.
+_state_gen = {"n": 0}
+
 
 def get_state():
     """
-    Call /lockState on RaspiNukiBridge to get LIVE Nuki state.
+    Return the Nuki state, calling the bridge at most once every STATE_TTL seconds.
+    """
+    with _state_lock:
+        now = time.monotonic()
+        if (
+            _state_cache["val"] is None
+            or _state_cache["gen"] != _state_gen["n"]
+            or now - _state_cache["ts"] >= STATE_TTL
+        ):
+            # Tag the answer with the generation it was requested under: if an
+            # action invalidates the state mid-fetch, the next call asks again.
+            gen = _state_gen["n"]
+            _state_cache["val"] = _fetch_state()
+            _state_cache["ts"] = time.monotonic()
+            _state_cache["gen"] = gen
+        return _state_cache["val"]
+
+
+# Background poller: /api/state is served from the latest snapshot instead of
+# blocking a worker on the bridge, and changes are pushed to /api/state/stream
+# subscribers. It only runs while the UI is being used (recent /api/state hits
+# or open streams), so an idle app does not keep waking up the lock. Pages
+# close their stream while hidden, so only a visible tab keeps it polling.
+POLL_INTERVAL = 5.0
+POLL_IDLE_TIMEOUT = 60.0
+
+_LATEST = {"val": None, "payload": None}
+_EVT = threading.Event()
+_poller = {"thread": None, "demand": 0.0}
+_subscribers = set()
+_poller_lock = threading.Lock()
+
+
+def _poll_loop():
+    while True:
+        with _poller_lock:
+            if not _subscribers and time.monotonic() - _poller["demand"] >= POLL_IDLE_TIMEOUT:
+                _poller["thread"] = None
+                return
+            subscribers = list(_subscribers)
+
+        gen = _state_gen["n"]
+        val = get_state()
+        if gen != _state_gen["n"]:
+            # Invalidated while fetching: the answer may predate the action.
+            _EVT.clear()
+            continue
+        _LATEST["val"] = val
+
+        payload = orjson.dumps(val)
+        if payload != _LATEST["payload"]:
+            _LATEST["payload"] = payload
+            for q in subscribers:
+                _offer(q, payload)
+
+        _EVT.wait(POLL_INTERVAL)
+        _EVT.clear()
+
+
+def _offer(q: queue.Queue, payload: bytes):
+    """Queue payload for a subscriber, replacing an undelivered older state."""
+    try:
+        q.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        q.put_nowait(payload)
+    except queue.Full:
+        pass
+
+
+def _ensure_poller():
+    with _poller_lock:
+        thread = _poller["thread"]
+        # is_alive(): a poller that died on an exception is replaced too.
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=_poll_loop, name="bridge-poller", daemon=True)
+            _poller["thread"] = thread
+            thread.start()
+
+
+def latest_state():
+    """
+    Return the last polled state, (re)starting the poller when needed.
+    Falls back to a direct (TTL-cached) bridge call before the first poll.
+    """
+    _poller["demand"] = time.monotonic()
+    _ensure_poller()
+
+    val = _LATEST["val"]
+    return val if val is not None else get_state()
+
+
+def subscribe_state() -> queue.Queue:
+    """Register a stream subscriber; it receives the JSON of every state change."""
+    q = queue.Queue(maxsize=1)
+    with _poller_lock:
+        _subscribers.add(q)
+    _ensure_poller()
+    return q
+
+
+def unsubscribe_state(q: queue.Queue):
+    with _poller_lock:
+        _subscribers.discard(q)
+
+
+def refresh_latest_state():
+    """Drop the snapshot and TTL cache and wake the poller, e.g. after a lock action.
+
+    Never waits for an in-flight state read: the generation bump alone expires it.
+    """
+    _state_gen["n"] += 1
+    _LATEST["val"] = None
+    _EVT.set()
+
+
+def _bridge_get(url: str, timeout: urllib3.Timeout, route: str):
+    """
+    GET a bridge endpoint: one status check, then a single orjson pass over the
+    raw body bytes (no text decoding or encoding detection in between).
     Errors are normalized so we never leak the full URL or token.
     """
     try:
-        resp = requests.get(
-            f"http://{BRIDGE_HOST}:{BRIDGE_PORT}/lockState",
-            params={
-                "nukiId": NUKI_ID,
-                "deviceType": DEVICE_TYPE,
-                "token": TOKEN,
-            },
-            timeout=10,
-        )
-        resp.raise_for_status()
-        return resp.json()
+        resp = POOL.request("GET", url, timeout=timeout)
+        if resp.status >= 400:
+            # Bridge replied with 4xx / 5xx. Do NOT expose the full URL (contains token).
+            return {"error": f"Bridge returned HTTP {resp.status} for {route}."}
+        return orjson.loads(resp.data)
 
-    except requests.exceptions.ConnectionError:
-        # Bridge not reachable at all (host down / port closed)
-        return {"error": "Bridge unreachable (connection error while calling /lockState)."}
+    except Exception as e:
+        return _bridge_error(route, e)
 
-    except requests.exceptions.Timeout:
-        # Bridge did not answer in time
-        return {"error": "Bridge timeout while calling /lockState."}
 
-    except requests.exceptions.HTTPError as e:
-        # Bridge replied with 4xx / 5xx. Do NOT expose the full URL (contains token).
-        status = e.response.status_code if e.response is not None else "HTTP error"
-        return {"error": f"Bridge returned HTTP {status} for /lockState."}
+def _bridge_error(route: str, exc: Exception) -> dict:
+    # NewConnectionError subclasses ConnectTimeoutError, so test it first.
+    if isinstance(exc, (NewConnectionError, ProtocolError)):
+        # Bridge not reachable at all (host down / port closed)
+        return {"error": f"Bridge unreachable (connection error while calling {route})."}
+    if isinstance(exc, BridgeTimeout):
+        # Bridge did not answer in time
+        return {"error": f"Bridge timeout while calling {route}."}
+    # Generic, safe message
+    return {"error": f"Unexpected error while talking to the bridge ({route})."}
 
-    except Exception:
-        # Generic, safe message
-        return {"error": "Unexpected error while talking to the bridge (/lockState)."}
 
+def _fetch_state():
+    """
+    Call /lockState on RaspiNukiBridge to get LIVE Nuki state.
+    """
+    return _bridge_get(_STATE_URL_FULL, _STATE_TIMEOUT, "/lockState")
 
 
 def send_action(action: int):
@@ -203,36 +453,9 @@ def send_action(action: int):
       3 = unlatch (open door)
       4 = lock'n'go
       5 = lock'n'go + unlatch
-
-    Errors are normalized so we never leak the full URL or token.
     """
-    try:
-        resp = requests.get(
-            f"http://{BRIDGE_HOST}:{BRIDGE_PORT}/lockAction",
-            params={
-                "nukiId": NUKI_ID,
-                "deviceType": DEVICE_TYPE,
-                "action": action,
-                "token": TOKEN,
-            },
-            timeout=20,
-        )
-        resp.raise_for_status()
-        return resp.json()
-
-    except requests.exceptions.ConnectionError:
-        return {"error": "Bridge unreachable (connection error while calling /lockAction)."}
-
-    except requests.exceptions.Timeout:
-        return {"error": "Bridge timeout while calling /lockAction."}
-
-    except requests.exceptions.HTTPError as e:
-        status = e.response.status_code if e.response is not None else "HTTP error"
-        return {"error": f"Bridge returned HTTP {status} for /lockAction."}
-
-    except Exception:
-        return {"error": "Unexpected error while talking to the bridge (/lockAction)."}
-
+    url = _ACTION_URL_FULL.get(action) or f"{ACTION_URL}?{_BASE_QS}&action={action}"
+    return _bridge_get(url, _ACTION_TIMEOUT, "/lockAction")
 
 
 # ========= HTML template =========
@@ -244,572 +467,9 @@ HTML_TEMPLATE = """<!doctype html>
   <title>{{ ui.title }}</title>
   <meta name="viewport" content="width=device-width, initial-scale=1">
 
-  <style>
-    :root {
-      --bg: #0f172a;
-      --card-bg: #020617;
-      --card-border: #1e293b;
-      --accent: #3b82f6;
-      --accent-soft: #1d4ed8;
-      --danger: #ef4444;
-      --success: #22c55e;
-      --warning: #f97316;
-      --text-main: #e5e7eb;
-      --text-muted: #9ca3af;
-      --chip-bg: #111827;
-      --chip-border: #374151;
-      --radius-lg: 16px;
-      --radius-md: 10px;
-      --shadow-soft: 0 18px 45px rgba(15,23,42,0.65);
-    }
-
-    * {
-      box-sizing: border-box;
-    }
-
-    body {
-      margin: 0;
-      padding: 0;
-      font-family: system-ui, -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-      background: radial-gradient(circle at top, #1d283a 0, #020617 55%, #000 100%);
-      color: var(--text-main);
-      min-height: 100vh;
-      display: flex;
-      align-items: flex-start;
-      justify-content: center;
-    }
-
-    .page {
-      width: 100%;
-      max-width: 960px;
-      padding: 24px 12px 40px;
-    }
-
-    .shell {
-      background: rgba(15,23,42,0.9);
-      border-radius: 28px;
-      border: 1px solid rgba(148,163,184,0.12);
-      box-shadow: var(--shadow-soft);
-      padding: 20px 22px 24px;
-      backdrop-filter: blur(22px);
-    }
-
-    .header {
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      gap: 12px;
-      margin-bottom: 18px;
-    }
-
-    .title-group {
-      display: flex;
-      flex-direction: column;
-      gap: 4px;
-    }
-
-    .title {
-      font-size: 1.3rem;
-      font-weight: 600;
-      letter-spacing: 0.02em;
-      display: flex;
-      align-items: center;
-      gap: 8px;
-    }
-
-    .title-pill {
-      font-size: 0.7rem;
-      padding: 2px 8px;
-      border-radius: 999px;
-      border: 1px solid rgba(148,163,184,0.6);
-      color: var(--text-muted);
-    }
-
-    .subtitle {
-      font-size: 0.85rem;
-      color: var(--text-muted);
-    }
-
-    .endpoint-pill {
-      font-size: 0.75rem;
-      padding: 4px 8px;
-      border-radius: 999px;
-      border: 1px solid rgba(148,163,184,0.4);
-      color: var(--text-muted);
-      display: inline-flex;
-      align-items: center;
-      gap: 6px;
-    }
-
-    .endpoint-pill code {
-      font-family: ui-monospace, Menlo, Monaco, "SF Mono", "Roboto Mono", monospace;
-      font-size: 0.73rem;
-      color: #e5e7eb;
-    }
-
-    .layout {
-      display: grid;
-      grid-template-columns: minmax(0, 2fr) minmax(0, 1.4fr);
-      gap: 16px;
-    }
-
-    @media (max-width: 768px) {
-      .layout {
-        grid-template-columns: minmax(0, 1fr);
-      }
-      .header {
-        flex-direction: column;
-        align-items: flex-start;
-      }
-    }
-
-    .card {
-      background: linear-gradient(135deg, rgba(15,23,42,0.96), rgba(15,23,42,0.86));
-      border-radius: var(--radius-lg);
-      border: 1px solid var(--card-border);
-      padding: 14px 14px 16px;
-    }
-
-    .card-header {
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      margin-bottom: 10px;
-    }
-
-    .card-title {
-      font-size: 0.9rem;
-      font-weight: 600;
-      text-transform: uppercase;
-      letter-spacing: 0.08em;
-      color: var(--text-muted);
-    }
-
-    .card-header small {
-      font-size: 0.75rem;
-      color: var(--text-muted);
-    }
-
-    .status-row {
-      display: grid;
-      grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
-      gap: 10px;
-      margin-top: 4px;
-    }
-
-    .chip {
-      background: var(--chip-bg);
-      border-radius: var(--radius-md);
-      padding: 8px 10px;
-      border: 1px solid var(--chip-border);
-      display: flex;
-      flex-direction: column;
-      gap: 4px;
-    }
-
-    .chip-label {
-      font-size: 0.75rem;
-      color: var(--text-muted);
-      text-transform: uppercase;
-      letter-spacing: 0.08em;
-    }
-
-    .chip-value {
-      font-size: 0.92rem;
-      font-weight: 500;
-    }
-
-    .chip-value.ok {
-      color: var(--success);
-    }
-
-    .chip-value.warn {
-      color: var(--warning);
-    }
-
-    .chip-value.danger {
-      color: var(--danger);
-    }
-
-    .chip-pill {
-      display: inline-flex;
-      align-items: center;
-      justify-content: center;
-      padding: 3px 8px;
-      border-radius: 999px;
-      font-size: 0.72rem;
-      border: 1px solid rgba(148,163,184,0.4);
-      color: var(--text-muted);
-      margin-top: 2px;
-    }
-
-    .msg {
-      margin-bottom: 8px;
-      padding: 8px 10px;
-      border-radius: var(--radius-md);
-      font-size: 0.85rem;
-      border: 1px solid rgba(148,163,184,0.3);
-      background: rgba(15,23,42,0.9);
-    }
-
-    .msg-ok {
-      border-color: rgba(34,197,94,0.6);
-      background: rgba(22,163,74,0.12);
-      color: #bbf7d0;
-    }
-
-    .msg-error {
-      border-color: rgba(239,68,68,0.7);
-      background: rgba(239,68,68,0.12);
-      color: #fecaca;
-    }
-
-    .buttons-grid {
-      display: grid;
-      grid-template-columns: repeat(auto-fit, minmax(130px, 1fr));
-      gap: 8px;
-      margin-top: 10px;
-    }
-
-    .buttons-grid form {
-      margin: 0;
-    }
-
-    button {
-      width: 100%;
-      border: none;
-      padding: 9px 0;
-      border-radius: 999px;
-      font-size: 0.95rem;
-      cursor: pointer;
-      font-weight: 500;
-      letter-spacing: 0.03em;
-      text-transform: uppercase;
-      display: inline-flex;
-      align-items: center;
-      justify-content: center;
-      gap: 6px;
-      transition: transform 0.07s ease, box-shadow 0.07s ease, background 0.12s ease;
-    }
-
-    button:active {
-      transform: translateY(1px);
-      box-shadow: none;
-    }
-
-    .btn-lock {
-      background: linear-gradient(135deg, #ef4444, #b91c1c);
-      color: #fff;
-      box-shadow: 0 6px 16px rgba(239,68,68,0.45);
-    }
-    .btn-unlock {
-      background: linear-gradient(135deg, #22c55e, #15803d);
-      color: #fff;
-      box-shadow: 0 6px 16px rgba(34,197,94,0.45);
-    }
-    .btn-unlatch {
-      background: linear-gradient(135deg, #f97316, #c2410c);
-      color: #fff;
-      box-shadow: 0 6px 16px rgba(249,115,22,0.45);
-    }
-    .btn-ln {
-      background: linear-gradient(135deg, #3b82f6, #1d4ed8);
-      color: #fff;
-      box-shadow: 0 6px 16px rgba(59,130,246,0.45);
-    }
-
-    .btn-secondary {
-      background: rgba(15,23,42,0.9);
-      color: var(--text-main);
-      border-radius: 999px;
-      padding: 6px 12px;
-      font-size: 0.8rem;
-      border: 1px solid rgba(148,163,184,0.6);
-      cursor: pointer;
-      display: inline-flex;
-      align-items: center;
-      gap: 6px;
-    }
-
-    .btn-icon {
-      font-size: 1rem;
-    }
-
-    .details {
-      margin-top: 6px;
-      border-radius: var(--radius-md);
-      border: 1px solid var(--card-border);
-      background: radial-gradient(circle at top left, rgba(30,64,175,0.33), rgba(15,23,42,0.96));
-      padding: 8px 10px;
-    }
-
-    .details summary {
-      cursor: pointer;
-      font-size: 0.8rem;
-      color: var(--text-muted);
-    }
-
-    pre {
-      white-space: pre-wrap;
-      font-family: ui-monospace, Menlo, Monaco, "SF Mono", "Roboto Mono", monospace;
-      font-size: 0.8rem;
-      margin-top: 4px;
-      color: #e5e7eb;
-    }
-
-    .footer {
-      margin-top: 10px;
-      text-align: right;
-      font-size: 0.76rem;
-      color: var(--text-muted);
-      opacity: 0.9;
-    }
-
-    /* Language switcher */
-
-    .top-right-box {
-      display: flex;
-      flex-direction: column;
-      align-items: flex-end;
-      gap: 8px;
-    }
-
-    .lang-switcher {
-      display: inline-flex;
-      gap: 6px;
-      align-items: center;
-      justify-content: flex-end;
-    }
-
-    .lang-btn {
-      border-radius: 999px;
-      border: 1px solid rgba(148,163,184,0.5);
-      background: rgba(15,23,42,0.8);
-      padding: 4px 8px;
-      font-size: 0.75rem;
-      cursor: pointer;
-      display: inline-flex;
-      align-items: center;
-      gap: 4px;
-      color: var(--text-muted);
-      width: auto;
-      box-shadow: none;
-    }
-
-    .lang-btn .flag {
-      font-size: 0.9rem;
-    }
-
-    .lang-btn.active {
-      background: linear-gradient(135deg, #3b82f6, #1d4ed8);
-      color: #fff;
-      border-color: transparent;
-    }
-
-    .lang-btn.active .flag {
-      filter: drop-shadow(0 0 3px rgba(15,23,42,0.8));
-    }
-  </style>
-
-  <script>
-    function formatTimestamp(ts) {
-      if (!ts) return "";
-      try {
-        const d = new Date(ts);
-        return d.toLocaleString("it-IT", { timeZone: "Europe/Rome" });
-      } catch (e) {
-        return ts;
-      }
-    }
-
-    function extractBatteryPercent(data) {
-      if (typeof data.batteryCharge === "number") {
-        return data.batteryCharge;
-      }
-      if (typeof data.batteryChargeState === "number") {
-        return data.batteryChargeState;
-      }
-      if (data.batteryChargeState && typeof data.batteryChargeState.chargeLevel === "number") {
-        return data.batteryChargeState.chargeLevel;
-      }
-      if (typeof data.batteryLevel === "number") {
-        return data.batteryLevel;
-      }
-      return null;
-    }
-
-    function extractBatteryStatusLabel(data) {
-      if (data.batteryChargeState && data.batteryChargeState.state) {
-        return data.batteryChargeState.state;
-      }
-      return null;
-    }
-
-    function buildStateSummary(data) {
-      let parts = [];
-
-      if (data.stateName) {
-        parts.push("{{ ui.js_label_state }}" + data.stateName + " (state=" + data.state + ")");
-      } else if (data.state !== undefined) {
-        parts.push("{{ ui.js_label_state }}state=" + data.state);
-      }
-
-      if (data.doorStateName) {
-        parts.push("{{ ui.js_label_door }}" + data.doorStateName + " (doorState=" + data.doorState + ")");
-      }
-
-      const battPct = extractBatteryPercent(data);
-      if (battPct !== null) {
-        parts.push("{{ ui.js_label_battery }}" + battPct + "%");
-      } else if (data.batteryCritical !== undefined) {
-        parts.push("{{ ui.js_label_battery }}" + (data.batteryCritical ? "CRITICAL" : "OK"));
-      }
-
-      if (data.timestamp) {
-        parts.push("{{ ui.js_label_last_update }}" + formatTimestamp(data.timestamp));
-      }
-
-      if (parts.length === 0) {
-        return "No state data available";
-      }
-      return parts.join(" • ");
-    }
-
-    function batteryClass(battPct, batteryCritical) {
-      if (batteryCritical === true) return "danger";
-      if (battPct === null || battPct === undefined) return "";
-      if (battPct <= 20) return "danger";
-      if (battPct <= 40) return "warn";
-      return "ok";
-    }
-
-    async function refreshState() {
-      const stateEl = document.getElementById("state-text");
-      const rawEl = document.getElementById("state-raw");
-      const lockEl = document.getElementById("chip-lock");
-      const doorEl = document.getElementById("chip-door");
-      const battEl = document.getElementById("chip-batt");
-      const timeEl = document.getElementById("chip-time");
-
-      try {
-        const res = await fetch("/api/state");
-
-        // Se proprio l'endpoint risponde 500/404 ecc.
-        if (!res.ok) {
-          stateEl.textContent = "{{ ui.bridge_error_prefix }}" +
-            "HTTP " + res.status + " from /api/state";
-          rawEl.textContent = "";
-
-          lockEl.querySelector(".chip-value").textContent = "-";
-          doorEl.querySelector(".chip-value").textContent = "-";
-          battEl.querySelector(".chip-value").textContent = "-";
-          battEl.querySelector(".chip-value").className = "chip-value";
-          timeEl.querySelector(".chip-value").textContent = "-";
-          return;
-        }
-
-        const data = await res.json();
-
-        if (data.error) {
-          // Errore lato bridge o lato requests
-          stateEl.textContent = "{{ ui.bridge_error_prefix }}" + data.error;
-          rawEl.textContent = "";
-
-          lockEl.querySelector(".chip-value").textContent = "-";
-          doorEl.querySelector(".chip-value").textContent = "-";
-          battEl.querySelector(".chip-value").textContent = "-";
-          battEl.querySelector(".chip-value").className = "chip-value";
-          timeEl.querySelector(".chip-value").textContent = "-";
-          return;
-        }
-
-        // --- da qui in giù rimane uguale a prima ---
-        stateEl.textContent = buildStateSummary(data);
-
-        const battPct = extractBatteryPercent(data);
-        const battLabel = extractBatteryStatusLabel(data);
-
-        const normalized = {
-          state: data.state,
-          stateName: data.stateName,
-          doorState: data.doorState,
-          doorStateName: data.doorStateName,
-          batteryCritical: data.batteryCritical,
-          batteryPercent: battPct,
-          batteryRawField: data.batteryChargeState,
-          batteryStatusLabel: battLabel,
-          trigger: data.trigger,
-          timestamp_raw: data.timestamp,
-          timestamp_local: data.timestamp ? formatTimestamp(data.timestamp) : null
-        };
-
-        rawEl.textContent = JSON.stringify(normalized, null, 2);
-
-        lockEl.querySelector(".chip-value").textContent =
-          data.stateName ? data.stateName + " (state=" + data.state + ")" :
-          (data.state !== undefined ? "state=" + data.state : "-");
-
-        doorEl.querySelector(".chip-value").textContent =
-          data.doorStateName ? data.doorStateName + " (doorState=" + data.doorState + ")" :
-          (data.doorState !== undefined ? "doorState=" + data.doorState : "-");
-
-        const battValueEl = battEl.querySelector(".chip-value");
-        battValueEl.className = "chip-value";
-        if (battPct !== null) {
-          battValueEl.textContent = battPct.toString() + "%";
-        } else if (data.batteryCritical !== undefined) {
-          battValueEl.textContent = data.batteryCritical ? "CRITICAL" : "OK";
-        } else {
-          battValueEl.textContent = "-";
-        }
-        const cls = batteryClass(battPct, data.batteryCritical);
-        if (cls) battValueEl.classList.add(cls);
-
-        const battExtraEl = battEl.querySelector(".chip-pill");
-        if (battLabel) {
-          battExtraEl.textContent = battLabel;
-          battExtraEl.style.display = "inline-flex";
-        } else if (data.batteryCritical === true) {
-          battExtraEl.textContent = "CRITICAL";
-          battExtraEl.style.display = "inline-flex";
-        } else {
-          battExtraEl.style.display = "none";
-        }
-
-        const timeValueEl = timeEl.querySelector(".chip-value");
-        if (data.timestamp) {
-          timeValueEl.textContent = formatTimestamp(data.timestamp);
-        } else {
-          timeValueEl.textContent = "-";
-        }
-
-      } catch (e) {
-        // Errore di rete / JS
-        stateEl.textContent = "{{ ui.js_error_prefix }}" + e;
-        rawEl.textContent = "";
-
-        lockEl.querySelector(".chip-value").textContent = "-";
-        doorEl.querySelector(".chip-value").textContent = "-";
-        battEl.querySelector(".chip-value").textContent = "-";
-        battEl.querySelector(".chip-value").className = "chip-value";
-        timeEl.querySelector(".chip-value").textContent = "-";
-      }
-    }
-
-    window.addEventListener("DOMContentLoaded", () => {
-      refreshState();
-
-      const langButtons = document.querySelectorAll(".lang-btn");
-      langButtons.forEach((btn) => {
-        btn.addEventListener("click", () => {
-          const lang = btn.getAttribute("data-lang");
-          const url = new URL(window.location.href);
-          url.searchParams.set("lang", lang);
-          window.location.href = url.toString();
-        });
-      });
-    });
-  </script>
+  <link rel="stylesheet" href="/static/app.css?v={{ asset_version['app.css'] }}">
+  <script>window.UI = JSON.parse({{ ui_json | safe }});</script>
+  <script src="/static/app.js?v={{ asset_version['app.js'] }}" defer></script>
 </head>
 
 <body>
@@ -843,7 +503,7 @@ HTML_TEMPLATE = """<!doctype html>
       </div>
 
       {% if msg %}
-        <div class="msg {% if ui.error_keyword in msg %}msg-error{% else %}msg-ok{% endif %}">
+        <div class="msg {% if msg_is_error %}msg-error{% else %}msg-ok{% endif %}">
           {{ msg }}
         </div>
       {% endif %}
@@ -936,69 +596,318 @@ HTML_TEMPLATE = """<!doctype html>
 """
 
 
-app = Flask(__name__)
+def strip_indent(source: str) -> str:
+    """Drop indentation and blank lines. Line breaks are kept, so JS is unaffected."""
+    return re.sub(r"\n\s+", "\n", source)
 
 
-@app.route("/")
-def index():
-    lang = resolve_lang()
-    ui = STRINGS[lang]
+def minify_html(source: str) -> str:
+    """Strip CSS comments, indentation and blank lines from HTML/CSS source."""
+    return strip_indent(re.sub(r"/\*.*?\*/", "", source, flags=re.S))
 
-    msg = request.args.get("msg", "")
 
-    lang_buttons = [
-        {"code": "en", "label": STRINGS["en"]["lang_en_label"]},
-        {"code": "it", "label": STRINGS["it"]["lang_it_label"]},
-    ]
+# Optional real minifiers for the static assets; without them the assets only
+# lose comments and indentation.
+try:
+    from rcssmin import cssmin
+except ImportError:
+    cssmin = minify_html
+
+try:
+    from rjsmin import jsmin
+except ImportError:
+    jsmin = strip_indent
+
+
+# Static assets are served from memory (see static_asset), not by Flask.
+app = Flask(__name__, static_folder=None)
+
+
+def precompressed(body: bytes) -> tuple:
+    """(body, gzipped body, strong ETag) for a response that never changes."""
+    return body, gzip.compress(body, compresslevel=9), hashlib.sha1(body).hexdigest()
+
+
+def send_precompressed(entry: tuple, mimetype: str) -> Response:
+    """Serve a precompressed() entry, honouring Accept-Encoding and If-None-Match."""
+    body, body_gz, etag = entry
+    use_gzip = request.accept_encodings.quality("gzip") > 0
+    # Each encoding is a distinct representation and needs its own strong ETag.
+    if use_gzip:
+        etag += "-gz"
+
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body_gz if use_gzip else body, mimetype=mimetype)
+        if use_gzip:
+            resp.headers["Content-Encoding"] = "gzip"
+    resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+# CSS/JS live in static/. They are minified and gzipped once at startup and
+# referenced with a content hash, so browsers can cache them forever.
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+_ASSET_TYPES = {
+    "app.css": ("text/css", cssmin),
+    "app.js": ("text/javascript", jsmin),
+}
+
 
-    return render_template_string(
-        HTML_TEMPLATE,
+def _load_asset(name: str) -> tuple:
+    _, minify = _ASSET_TYPES[name]
+    with open(os.path.join(STATIC_DIR, name), "r", encoding="utf-8") as f:
+        return precompressed(minify(f.read()).encode("utf-8"))
+
+
+_ASSETS = {name: _load_asset(name) for name in _ASSET_TYPES}
+ASSET_VERSION = {name: etag[:12] for name, (_, _, etag) in _ASSETS.items()}
+
+
+# Responses that are worth gzipping on the fly. Tiny bodies (most /api/state
+# replies) are left alone: the gzip header would outweigh the savings.
+COMPRESS_MIMETYPES = frozenset(("text/html", "application/json"))
+COMPRESS_MIN_SIZE = 500
+COMPRESS_LEVEL = 4
+
+
+@app.after_request
+def compress_response(resp):
+    """Gzip text responses when the client accepts it (cached pages/assets are pre-gzipped)."""
+    if (
+        resp.status_code != 200
+        or resp.mimetype not in COMPRESS_MIMETYPES
+        or "Content-Encoding" in resp.headers
+        or resp.is_streamed
+        or request.accept_encodings.quality("gzip") <= 0
+    ):
+        return resp
+
+    data = resp.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return resp
+
+    resp.set_data(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    resp.headers["Content-Encoding"] = "gzip"
+    etag, weak = resp.get_etag()
+    if etag:
+        # The gzipped body is a different representation from the original.
+        resp.set_etag(etag + "-gz", weak)
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+# Compile the template once; rendering it per request skips the Jinja parse.
+# It lives in its own environment: it needs none of Flask's template globals.
+_JINJA_ENV = jinja2.Environment(autoescape=True, optimized=True, auto_reload=False)
+_TEMPLATE = _JINJA_ENV.from_string(minify_html(HTML_TEMPLATE))
+
+
+_LANG_BUTTONS = (
+    {"code": "en", "label": STRINGS_NS["en"].lang_en_label},
+    {"code": "it", "label": STRINGS_NS["it"].lang_it_label},
+)
+
+
+def render_index(lang: str, msg: str = "", msg_is_error: bool = False) -> str:
+    ui = STRINGS_NS[lang]
+
+    return _TEMPLATE.render(
         msg=msg,
+        msg_is_error=msg_is_error,
         bridge_host=BRIDGE_HOST,
         bridge_port=BRIDGE_PORT,
         nuki_id=NUKI_ID,
         ui=ui,
+        ui_json=UI_JSON[lang],
+        asset_version=ASSET_VERSION,
         lang=lang,
-        lang_buttons=lang_buttons,
+        lang_buttons=_LANG_BUTTONS,
     )
 
 
+# Without a message the page only depends on the language, so every variant
+# is rendered (and gzipped) once at startup.
+_PAGE_BY_LANG = {lang: precompressed(render_index(lang).encode("utf-8")) for lang in STRINGS}
+
+# Pages with a message are pre-rendered too, around a placeholder that is
+# swapped for the (escaped) message per request. Keyed by (lang, msg_is_error).
+_MSG_MARK = "@@NUKI_MSG@@"
+_MSG_PAGE = {
+    (lang, is_error): render_index(lang, _MSG_MARK, is_error)
+    for lang in STRINGS
+    for is_error in (False, True)
+}
+
+
+@functools.lru_cache(maxsize=32)
+def render_msg_page(lang: str, msg_is_error: bool, msg: str) -> tuple:
+    """precompressed() message page; memoized since a redirect and reloads repeat the same msg."""
+    page = _MSG_PAGE[(lang, msg_is_error)].replace(_MSG_MARK, str(escape(msg)))
+    return precompressed(page.encode("utf-8"))
+
+
+@app.route("/")
+def index():
+    lang, _ = resolve_lang()
+    msg = request.args.get("msg", "")
+
+    if msg:
+        # action() flags error messages with ?err=1, so no keyword scan is needed.
+        page = render_msg_page(lang, request.args.get("err") == "1", msg)
+        return send_precompressed(page, "text/html")
+
+    return send_precompressed(_PAGE_BY_LANG[lang], "text/html")
+
+
+@app.route("/static/<name>")
+def static_asset(name):
+    entry = _ASSETS.get(name)
+    if entry is None:
+        abort(404)
+
+    resp = send_precompressed(entry, _ASSET_TYPES[name][0])
+    if request.args.get("v") == ASSET_VERSION[name]:
+        # Versioned URLs never change: let browsers keep them for a year.
+        resp.cache_control.public = True
+        resp.cache_control.max_age = 31536000
+        resp.cache_control.immutable = True
+    return resp
+
+
+# Encoded body + ETag of the last state served. The poller snapshot is reused
+# until the next poll, so repeated hits skip both the encoding and the hashing.
+_state_body = {"entry": (None, "", b"")}
+
+
+def _encode_state(state) -> tuple:
+    cached_state, etag, body = _state_body["entry"]
+    if cached_state is not state:
+        body = orjson.dumps(state)
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        _state_body["entry"] = (state, etag, body)
+    return etag, body
+
+
 @app.route("/api/state")
 def api_state():
-    return jsonify(get_state())
+    etag, body = _encode_state(latest_state())
+
+    # compress_response() tags gzipped bodies with "-gz"; same state either way.
+    if request.if_none_match.contains(etag) or request.if_none_match.contains(etag + "-gz"):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    # Always revalidate: the state can change at any moment.
+    resp.cache_control.no_cache = True
+    return resp
+
+
+# Seconds between SSE comment lines that keep idle streams (and proxies) alive.
+SSE_KEEPALIVE = 15.0
+
+# Each open stream holds a server thread. Cap them below the thread count so
+# lock actions and page loads always find a free thread; refused clients fall
+# back to a one-shot /api/state fetch.
+SSE_MAX_STREAMS = max(WEB_THREADS - 2, 0)
+
+# A stream ends after SSE_MAX_AGE seconds and the browser reconnects after
+# SSE_RETRY_MS, so a tab that went away frees its thread within that bound.
+SSE_MAX_AGE = 300.0
+SSE_RETRY_MS = 3000
+
+_stream_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+
+def _event_stream():
+    q = subscribe_state()
+    try:
+        deadline = time.monotonic() + SSE_MAX_AGE
+        last = orjson.dumps(latest_state())
+        yield b"retry: %d\ndata: %s\n\n" % (SSE_RETRY_MS, last)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                payload = q.get(timeout=min(SSE_KEEPALIVE, remaining))
+            except queue.Empty:
+                yield b": ping\n\n"
+                continue
+            if payload != last:
+                last = payload
+                yield b"data: " + payload + b"\n\n"
+    finally:
+        unsubscribe_state(q)
+
+
+@app.route("/api/state/stream")
+def api_state_stream():
+    """Server-sent events: one message per lock state change, from the shared poller."""
+    if not _stream_slots.acquire(blocking=False):
+        resp = Response("Too many open state streams.", status=503, mimetype="text/plain")
+        resp.headers["Retry-After"] = str(int(SSE_MAX_AGE))
+        return resp
+
+    resp = Response(_event_stream(), mimetype="text/event-stream")
+    # The WSGI server closes the response when the stream ends or the client
+    # goes away, even if the generator never started.
+    resp.call_on_close(_stream_slots.release)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+
+# /action/<cmd> -> bridge lockAction code (read-only)
+_CMD_MAP = types.MappingProxyType({
+    "sblocca": 1,   # unlock
+    "chiudi": 2,    # lock
+    "apri": 3,      # unlatch (open door)
+    "lockngo": 4,   # lock'n'go
+    # "lockngounlatch": 5,
+})
 
 
 @app.route("/action/<cmd>", methods=["POST"])
 def action(cmd):
-    lang = resolve_lang()
-    ui = STRINGS[lang]
+    lang, ui = resolve_lang()
 
-    mapping = {
-        "sblocca": 1,   # unlock
-        "chiudi": 2,    # lock
-        "apri": 3,      # unlatch (open door)
-        "lockngo": 4,   # lock'n'go
-        # "lockngounlatch": 5,
-    }
-
-    if cmd not in mapping:
-        return redirect(url_for("index", msg=ui["unknown_command_msg"], lang=lang))
+    action_code = _CMD_MAP.get(cmd)
+    if action_code is None:
+        return redirect(
+            "/?" + urlencode({"msg": ui.unknown_command_msg, "err": 1, "lang": lang})
+        )
 
-    result = send_action(mapping[cmd])
+    result = send_action(action_code)
+    refresh_latest_state()
 
-    if "error" in result:
-        msg = ui["bridge_error_prefix"] + str(result["error"])
+    msg_is_error = "error" in result
+    if msg_is_error:
+        msg = ui.bridge_error_prefix + str(result["error"])
     else:
         if result.get("success"):
-            msg = ui["ok_msg"].format(
+            msg = ui.ok_msg.format(
                 batteryCritical=result.get("batteryCritical", False)
             )
         else:
-            msg = ui["bridge_response_prefix"] + str(result)
+            msg = ui.bridge_response_prefix + str(result)
 
-    return redirect(url_for("index", msg=msg, lang=lang))
+    query = {"msg": msg, "lang": lang}
+    if msg_is_error:
+        query["err"] = 1
+    return redirect("/?" + urlencode(query))
 
 
 if __name__ == "__main__":
-    # Listen on all interfaces so it is reachable from your LAN / VPN
-    app.run(host="0.0.0.0", port=WEB_PORT)
+    # Listen on all interfaces so it is reachable from your LAN / VPN.
+    # Prefer waitress (multi-threaded production server) when it is installed.
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host="0.0.0.0", port=WEB_PORT, threaded=True)
+    else:
+        serve(app, host="0.0.0.0", port=WEB_PORT, threads=WEB_THREADS)
@@ -0,0 +1,247 @@
+function formatTimestamp(ts) {
+  if (!ts) return "";
+  try {
+    const d = new Date(ts);
+    return d.toLocaleString("it-IT", { timeZone: "Europe/Rome" });
+  } catch (e) {
+    return ts;
+  }
+}
+
+function extractBatteryPercent(data) {
+  if (typeof data.batteryCharge === "number") {
+    return data.batteryCharge;
+  }
+  if (typeof data.batteryChargeState === "number") {
+    return data.batteryChargeState;
+  }
+  if (data.batteryChargeState && typeof data.batteryChargeState.chargeLevel === "number") {
+    return data.batteryChargeState.chargeLevel;
+  }
+  if (typeof data.batteryLevel === "number") {
+    return data.batteryLevel;
+  }
+  return null;
+}
+
+function extractBatteryStatusLabel(data) {
+  if (data.batteryChargeState && data.batteryChargeState.state) {
+    return data.batteryChargeState.state;
+  }
+  return null;
+}
+
+function buildStateSummary(data) {
+  let parts = [];
+
+  if (data.stateName) {
+    parts.push(UI.js_label_state + data.stateName + " (state=" + data.state + ")");
+  } else if (data.state !== undefined) {
+    parts.push(UI.js_label_state + "state=" + data.state);
+  }
+
+  if (data.doorStateName) {
+    parts.push(UI.js_label_door + data.doorStateName + " (doorState=" + data.doorState + ")");
+  }
+
+  const battPct = extractBatteryPercent(data);
+  if (battPct !== null) {
+    parts.push(UI.js_label_battery + battPct + "%");
+  } else if (data.batteryCritical !== undefined) {
+    parts.push(UI.js_label_battery + (data.batteryCritical ? "CRITICAL" : "OK"));
+  }
+
+  if (data.timestamp) {
+    parts.push(UI.js_label_last_update + formatTimestamp(data.timestamp));
+  }
+
+  if (parts.length === 0) {
+    return "No state data available";
+  }
+  return parts.join(" • ");
+}
+
+function batteryClass(battPct, batteryCritical) {
+  if (batteryCritical === true) return "danger";
+  if (battPct === null || battPct === undefined) return "";
+  if (battPct <= 20) return "danger";
+  if (battPct <= 40) return "warn";
+  return "ok";
+}
+
+function renderState(data) {
+  const stateEl = document.getElementById("state-text");
+  const rawEl = document.getElementById("state-raw");
+  const lockEl = document.getElementById("chip-lock");
+  const doorEl = document.getElementById("chip-door");
+  const battEl = document.getElementById("chip-batt");
+  const timeEl = document.getElementById("chip-time");
+
+  if (data.error) {
+    // Errore lato bridge o lato requests
+    stateEl.textContent = UI.bridge_error_prefix + data.error;
+    rawEl.textContent = "";
+
+    lockEl.querySelector(".chip-value").textContent = "-";
+    doorEl.querySelector(".chip-value").textContent = "-";
+    battEl.querySelector(".chip-value").textContent = "-";
+    battEl.querySelector(".chip-value").className = "chip-value";
+    timeEl.querySelector(".chip-value").textContent = "-";
+    return;
+  }
+
+  // --- da qui in giù rimane uguale a prima ---
+  stateEl.textContent = buildStateSummary(data);
+
+  const battPct = extractBatteryPercent(data);
+  const battLabel = extractBatteryStatusLabel(data);
+
+  const normalized = {
+    state: data.state,
+    stateName: data.stateName,
+    doorState: data.doorState,
+    doorStateName: data.doorStateName,
+    batteryCritical: data.batteryCritical,
+    batteryPercent: battPct,
+    batteryRawField: data.batteryChargeState,
+    batteryStatusLabel: battLabel,
+    trigger: data.trigger,
+    timestamp_raw: data.timestamp,
+    timestamp_local: data.timestamp ? formatTimestamp(data.timestamp) : null
+  };
+
+  rawEl.textContent = JSON.stringify(normalized, null, 2);
+
+  lockEl.querySelector(".chip-value").textContent =
+    data.stateName ? data.stateName + " (state=" + data.state + ")" :
+    (data.state !== undefined ? "state=" + data.state : "-");
+
+  doorEl.querySelector(".chip-value").textContent =
+    data.doorStateName ? data.doorStateName + " (doorState=" + data.doorState + ")" :
+    (data.doorState !== undefined ? "doorState=" + data.doorState : "-");
+
+  const battValueEl = battEl.querySelector(".chip-value");
+  battValueEl.className = "chip-value";
+  if (battPct !== null) {
+    battValueEl.textContent = battPct.toString() + "%";
+  } else if (data.batteryCritical !== undefined) {
+    battValueEl.textContent = data.batteryCritical ? "CRITICAL" : "OK";
+  } else {
+    battValueEl.textContent = "-";
+  }
+  const cls = batteryClass(battPct, data.batteryCritical);
+  if (cls) battValueEl.classList.add(cls);
+
+  const battExtraEl = battEl.querySelector(".chip-pill");
+  if (battLabel) {
+    battExtraEl.textContent = battLabel;
+    battExtraEl.style.display = "inline-flex";
+  } else if (data.batteryCritical === true) {
+    battExtraEl.textContent = "CRITICAL";
+    battExtraEl.style.display = "inline-flex";
+  } else {
+    battExtraEl.style.display = "none";
+  }
+
+  const timeValueEl = timeEl.querySelector(".chip-value");
+  if (data.timestamp) {
+    timeValueEl.textContent = formatTimestamp(data.timestamp);
+  } else {
+    timeValueEl.textContent = "-";
+  }
+}
+
+async function refreshState() {
+  const stateEl = document.getElementById("state-text");
+  const rawEl = document.getElementById("state-raw");
+  const lockEl = document.getElementById("chip-lock");
+  const doorEl = document.getElementById("chip-door");
+  const battEl = document.getElementById("chip-batt");
+  const timeEl = document.getElementById("chip-time");
+
+  try {
+    const res = await fetch("/api/state");
+
+    // Se proprio l'endpoint risponde 500/404 ecc.
+    if (!res.ok) {
+      stateEl.textContent = UI.bridge_error_prefix +
+        "HTTP " + res.status + " from /api/state";
+      rawEl.textContent = "";
+
+      lockEl.querySelector(".chip-value").textContent = "-";
+      doorEl.querySelector(".chip-value").textContent = "-";
+      battEl.querySelector(".chip-value").textContent = "-";
+      battEl.querySelector(".chip-value").className = "chip-value";
+      timeEl.querySelector(".chip-value").textContent = "-";
+      return;
+    }
+
+    renderState(await res.json());
+
+  } catch (e) {
+    // Errore di rete / JS
+    stateEl.textContent = UI.js_error_prefix + e;
+    rawEl.textContent = "";
+
+    lockEl.querySelector(".chip-value").textContent = "-";
+    doorEl.querySelector(".chip-value").textContent = "-";
+    battEl.querySelector(".chip-value").textContent = "-";
+    battEl.querySelector(".chip-value").className = "chip-value";
+    timeEl.querySelector(".chip-value").textContent = "-";
+  }
+}
+
+// Live updates pushed by the server; falls back to a one-shot fetch.
+// The stream is only kept open while the page is visible: an open stream
+// keeps the server polling the lock.
+let stateSource = null;
+
+function subscribeState() {
+  if (!window.EventSource) {
+    refreshState();
+    return;
+  }
+  const source = new EventSource("/api/state/stream");
+  source.onmessage = (event) => renderState(JSON.parse(event.data));
+  source.onerror = () => {
+    // CLOSED: the server refused the stream (e.g. 503, too many open tabs).
+    // Otherwise the browser is already reconnecting on its own.
+    if (source.readyState === EventSource.CLOSED) {
+      refreshState();
+    }
+  };
+  stateSource = source;
+}
+
+function unsubscribeState() {
+  if (stateSource) {
+    stateSource.close();
+    stateSource = null;
+  }
+}
+
+document.addEventListener("visibilitychange", () => {
+  if (document.hidden) {
+    unsubscribeState();
+  } else if (!stateSource) {
+    subscribeState();
+  }
+});
+
+window.addEventListener("DOMContentLoaded", () => {
+  if (document.hidden) {
+    refreshState();
+  } else {
+    subscribeState();
+  }
+
+  const langButtons = document.querySelectorAll(".lang-btn");
+  langButtons.forEach((btn) => {
+    btn.addEventListener("click", () => {
+      const lang = btn.getAttribute("data-lang");
+      const url = new URL(window.location.href);
+      url.searchParams.set("lang", lang);
+      window.location.href = url.toString();
+    });
+  });
+});
@@ -0,0 +1,9 @@
+"""WSGI entry point for production servers, e.g.:
+
+    gunicorn --preload -w 1 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+With --preload, config loading and page pre-rendering run once in the master
+process and are inherited by the workers.
+"""
+
+from app import app  # noqa: F401